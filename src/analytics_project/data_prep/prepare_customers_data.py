@@ -10,7 +10,7 @@ from pathlib import Path
 import pandas as pd
 
 from analytics_project.utils_logger import logger, project_root
-from analytics_project.data_scrubber import DataScrubber
+from analytics_project.data_scrubber import DataScrubber, write_prepared_csv
 
 # -------------------------------------------------
 # Paths
@@ -19,32 +19,34 @@ DATA_DIR: Path = project_root / "data"
 RAW_DATA_DIR: Path = DATA_DIR / "raw"
 PREPARED_DATA_DIR: Path = DATA_DIR / "prepared"
 
-DATA_DIR.mkdir(exist_ok=True)
-RAW_DATA_DIR.mkdir(exist_ok=True)
-PREPARED_DATA_DIR.mkdir(exist_ok=True)
-
 
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
+def _ensure_dirs() -> None:
+    """Create the data folders on first use rather than at import time."""
+    for directory in (DATA_DIR, RAW_DATA_DIR, PREPARED_DATA_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
+
 def read_raw_data(file_name: str) -> pd.DataFrame:
     """Read raw customers CSV."""
     file_path = RAW_DATA_DIR / file_name
-    logger.info(f"READING raw customers from: {file_path}")
+    logger.info("READING raw customers from: {}", file_path)
     try:
-        df = pd.read_csv(file_path)
-        logger.info(f"Loaded customers raw shape={df.shape}")
+        df = pd.read_csv(file_path, engine="pyarrow")
+        logger.info("Loaded customers raw shape={}", df.shape)
         return df
     except Exception as exc:
-        logger.error(f"Error reading customers file {file_path}: {exc}")
+        logger.error("Error reading customers file {}: {}", file_path, exc)
         return pd.DataFrame()
 
 
 def save_prepared_data(df: pd.DataFrame, file_name: str) -> None:
     """Write cleaned customers CSV."""
     file_path = PREPARED_DATA_DIR / file_name
-    logger.info(f"WRITING prepared customers to: {file_path} shape={df.shape}")
-    df.to_csv(file_path, index=False)
+    logger.info("WRITING prepared customers to: {} shape={}", file_path, df.shape)
+    write_prepared_csv(df, file_path)
 
 
 # -------------------------------------------------
@@ -55,6 +57,8 @@ def main() -> None:
     logger.info("STARTING prepare_customers_data.py")
     logger.info("=====================================")
 
+    _ensure_dirs()
+
     input_file = "customers_data.csv"
     output_file = "customers_data_prepared.csv"
 
@@ -64,32 +68,44 @@ def main() -> None:
         return
 
     original_shape = df_raw.shape
-    logger.info(f"Initial customers shape: {original_shape}")
-    logger.info(f"Initial customers columns: {list(df_raw.columns)}")
+    logger.info("Initial customers shape: {}", original_shape)
+    logger.info("Initial customers columns: {}", list(df_raw.columns))
 
     # Strip column names
-    df_raw.columns = df_raw.columns.str.strip()
+    df_raw.columns = [c.strip() for c in df_raw.columns]
 
     # Wrap in DataScrubber
     scrubber = DataScrubber(df_raw)
 
-    # Pipeline using DataScrubber
-    scrubber.remove_duplicate_records()
+    # Narrow numeric dtypes so the mask and quantile passes move fewer bytes
+    scrubber.downcast_numeric_columns()
+    logger.info("Numeric dtypes: {}", scrubber.df.select_dtypes(include="number").dtypes.to_dict())
+
+    # Pipeline using DataScrubber (duplicates are marked here, dropped with the outliers below)
+    keep = ~scrubber.duplicate_mask()
     scrubber.handle_missing_data(drop=False, fill_value="Unknown")
     scrubber.format_column_strings_to_lower_and_trim(
         "CustomerName"
     ) if "CustomerName" in scrubber.df.columns else None
 
     # If you added numeric columns in D3.1 (e.g. "loyalty_points")
-    for col in scrubber.df.select_dtypes(include="number").columns:
-        scrubber.filter_column_outliers(
-            col, scrubber.df[col].quantile(0.01), scrubber.df[col].quantile(0.99)
-        )
+    # Bounds are taken from the de-duplicated rows.
+    numeric_cols = scrubber.df.select_dtypes(include="number").columns.tolist()
+    bounds = scrubber.df.loc[keep, numeric_cols].quantile([0.01, 0.99])
+    in_bounds = scrubber.numeric_outlier_mask(numeric_cols, bounds.loc[0.01], bounds.loc[0.99])
+    logger.info(
+        "Dropping {} duplicate and {} outlier rows",
+        int((~keep).sum()),
+        int((keep & ~in_bounds).sum()),
+    )
+
+    # Select the kept rows once
+    scrubber.df = scrubber.df[keep & in_bounds]
 
     df_clean = scrubber.df
     save_prepared_data(df_clean, output_file)
 
-    logger.info(f"Prepared customers shape:  {df_clean.shape}")
+    logger.info("Prepared customers shape:  {}", df_clean.shape)
     logger.info("FINISHED prepare_customers_data.py")
     logger.info("=====================================")
 
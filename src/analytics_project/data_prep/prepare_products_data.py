@@ -10,33 +10,34 @@ from pathlib import Path
 import pandas as pd
 
 from analytics_project.utils_logger import logger, project_root
-from analytics_project.data_scrubber import DataScrubber
+from analytics_project.data_scrubber import DataScrubber, write_prepared_csv
 
 DATA_DIR: Path = project_root / "data"
 RAW_DATA_DIR: Path = DATA_DIR / "raw"
 PREPARED_DATA_DIR: Path = DATA_DIR / "prepared"
 
-DATA_DIR.mkdir(exist_ok=True)
-RAW_DATA_DIR.mkdir(exist_ok=True)
-PREPARED_DATA_DIR.mkdir(exist_ok=True)
+
+def _ensure_dirs() -> None:
+    for directory in (DATA_DIR, RAW_DATA_DIR, PREPARED_DATA_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
 
 
 def read_raw_data(file_name: str) -> pd.DataFrame:
     file_path = RAW_DATA_DIR / file_name
-    logger.info(f"READING raw products from: {file_path}")
+    logger.info("READING raw products from: {}", file_path)
     try:
-        df = pd.read_csv(file_path)
-        logger.info(f"Loaded products raw shape={df.shape}")
+        df = pd.read_csv(file_path, engine="pyarrow")
+        logger.info("Loaded products raw shape={}", df.shape)
         return df
     except Exception as exc:
-        logger.error(f"Error reading products file {file_path}: {exc}")
+        logger.error("Error reading products file {}: {}", file_path, exc)
         return pd.DataFrame()
 
 
 def save_prepared_data(df: pd.DataFrame, file_name: str) -> None:
     file_path = PREPARED_DATA_DIR / file_name
-    logger.info(f"WRITING prepared products to: {file_path} shape={df.shape}")
-    df.to_csv(file_path, index=False)
+    logger.info("WRITING prepared products to: {} shape={}", file_path, df.shape)
+    write_prepared_csv(df, file_path)
 
 
 def main() -> None:
@@ -44,6 +45,8 @@ def main() -> None:
     logger.info("STARTING prepare_products_data.py")
     logger.info("=====================================")
 
+    _ensure_dirs()
+
     input_file = "products_data.csv"
     output_file = "products_data_prepared.csv"
 
@@ -53,34 +56,45 @@ def main() -> None:
         return
 
     original_shape = df_raw.shape
-    logger.info(f"Initial products shape: {original_shape}")
-    logger.info(f"Initial products columns: {list(df_raw.columns)}")
+    logger.info("Initial products shape: {}", original_shape)
+    logger.info("Initial products columns: {}", list(df_raw.columns))
 
-    scrubber = DataScrubber(df_raw.copy())
+    scrubber = DataScrubber(df_raw)
 
     # Standardize column names
-    scrubber.df.columns = scrubber.df.columns.str.strip().str.lower().str.replace(" ", "_")
+    scrubber.df.columns = [c.strip().lower().replace(" ", "_") for c in scrubber.df.columns]
 
-    # Pipeline
-    scrubber.remove_duplicate_records()
+    # Narrow numeric dtypes so the mask and quantile passes move fewer bytes
+    scrubber.downcast_numeric_columns()
+    logger.info("Numeric dtypes: {}", scrubber.df.select_dtypes(include="number").dtypes.to_dict())
+
+    # Pipeline (duplicates are marked here, dropped together with the outliers below)
+    keep = ~scrubber.duplicate_mask()
     scrubber.handle_missing_data(fill_value="Unknown")
 
-    # Format relevant string columns
+    # Format relevant string columns (as categories, so each distinct value is formatted once)
     string_cols = scrubber.df.select_dtypes(include="object").columns
     for col in string_cols:
+        scrubber.convert_column_to_new_data_type(col, "category")
         scrubber.format_column_strings_to_lower_and_trim(col)
 
-    # Outliers for numeric columns
-    numeric_cols = scrubber.df.select_dtypes(include="number").columns
-    for col in numeric_cols:
-        q_low = scrubber.df[col].quantile(0.01)
-        q_high = scrubber.df[col].quantile(0.99)
-        scrubber.filter_column_outliers(col, q_low, q_high)
+    # Outliers for numeric columns, with bounds taken from the de-duplicated rows
+    numeric_cols = scrubber.df.select_dtypes(include="number").columns.tolist()
+    bounds = scrubber.df.loc[keep, numeric_cols].quantile([0.01, 0.99])
+    in_bounds = scrubber.numeric_outlier_mask(numeric_cols, bounds.loc[0.01], bounds.loc[0.99])
+    logger.info(
+        "Dropping {} duplicate and {} outlier rows",
+        int((~keep).sum()),
+        int((keep & ~in_bounds).sum()),
+    )
+
+    # Select the kept rows once
+    scrubber.df = scrubber.df[keep & in_bounds]
 
     df_clean = scrubber.df
     save_prepared_data(df_clean, output_file)
 
-    logger.info(f"Prepared products shape:  {df_clean.shape}")
+    logger.info("Prepared products shape:  {}", df_clean.shape)
     logger.info("FINISHED prepare_products_data.py")
     logger.info("=====================================")
 
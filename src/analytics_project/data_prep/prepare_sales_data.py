@@ -1,42 +1,191 @@
-"""
-analytics_project/data_prep/prepare_sales_data.py
+"""analytics_project/data_prep/prepare_sales_data.py
 
 Clean sales_data.csv and write sales_data_prepared.csv using DataScrubber.
 """
 
 from __future__ import annotations
 
+from collections import defaultdict
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 
+from analytics_project.data_scrubber import DataScrubber, write_prepared_csv
 from analytics_project.utils_logger import logger, project_root
-from analytics_project.data_scrubber import DataScrubber
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 DATA_DIR: Path = project_root / "data"
 RAW_DATA_DIR: Path = DATA_DIR / "raw"
 PREPARED_DATA_DIR: Path = DATA_DIR / "prepared"
 
-DATA_DIR.mkdir(exist_ok=True)
-RAW_DATA_DIR.mkdir(exist_ok=True)
-PREPARED_DATA_DIR.mkdir(exist_ok=True)
+# Raw files larger than this are cleaned chunk by chunk so memory stays bounded
+CHUNKED_THRESHOLD_BYTES: int = 512 * 1024 * 1024
+CHUNK_SIZE: int = 200_000
+# De-duplicated rows kept in the reservoir sample that the chunked outlier bounds come from
+SAMPLE_SIZE: int = 100_000
+
+
+def _ensure_dirs() -> None:
+    for directory in (DATA_DIR, RAW_DATA_DIR, PREPARED_DATA_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
 
 
 def read_raw_data(file_name: str) -> pd.DataFrame:
     file_path = RAW_DATA_DIR / file_name
-    logger.info(f"READING raw sales from: {file_path}")
+    logger.info("READING raw sales from: {}", file_path)
     try:
-        df = pd.read_csv(file_path)
-        logger.info(f"Loaded sales raw shape={df.shape}")
+        df = pd.read_csv(file_path, engine="pyarrow")
+        logger.info("Loaded sales raw shape={}", df.shape)
         return df
     except Exception as exc:
-        logger.error(f"Error reading sales file {file_path}: {exc}")
+        logger.error("Error reading sales file {}: {}", file_path, exc)
         return pd.DataFrame()
 
 
 def save_prepared_data(df: pd.DataFrame, file_name: str) -> None:
     file_path = PREPARED_DATA_DIR / file_name
-    logger.info(f"WRITING prepared sales to: {file_path} shape={df.shape}")
-    df.to_csv(file_path, index=False)
+    logger.info("WRITING prepared sales to: {} shape={}", file_path, df.shape)
+    write_prepared_csv(df, file_path)
+
+
+def parse_numeric_text(values: pd.Series) -> pd.Series | None:
+    """Parse a text column as int64, else float64; None if some value is not a number."""
+    # int64 only succeeds for whole numbers without gaps, matching how read_csv types a column
+    for dtype in ("int64", "float64"):
+        try:
+            return values.astype(dtype)
+        except (TypeError, ValueError, OverflowError):
+            continue
+    return None
+
+
+def scan_numeric_dtypes(file_path: Path) -> dict[str, np.dtype]:
+    """Pass 1: pick the dtype each numeric column gets when the whole file is read at once.
+
+    A column is numeric when every non-missing value in every chunk parses as a
+    number. It stays an integer column if every chunk holds whole numbers
+    without gaps, otherwise it is a float column. Each chunk is narrowed with
+    DataScrubber.downcast_numeric_columns, and the file-wide dtype is the widest
+    per-chunk result.
+    """
+    int_dtypes: dict[str, np.dtype | None] = {}
+    float_dtypes: dict[str, np.dtype] = {}
+    candidates: list[str] | None = None
+
+    for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str):
+        parsed = {}
+        for col in chunk.columns if candidates is None else candidates:
+            values = parse_numeric_text(chunk[col])
+            if values is not None:
+                parsed[col] = values
+        candidates = list(parsed)
+
+        whole = {col: values for col, values in parsed.items() if values.dtype.kind == "i"}
+        as_float = {col: values.astype("float64") for col, values in parsed.items()}
+        chunk_ints = DataScrubber(pd.DataFrame(whole)).downcast_numeric_columns().dtypes
+        chunk_floats = DataScrubber(pd.DataFrame(as_float)).downcast_numeric_columns().dtypes
+        for col in candidates:
+            int_dtype = chunk_ints.get(col)
+            previous = int_dtypes.get(col, int_dtype)
+            if int_dtype is None or previous is None:
+                int_dtypes[col] = None
+            else:
+                int_dtypes[col] = np.result_type(previous, int_dtype)
+            float_dtype = chunk_floats[col]
+            float_dtypes[col] = np.result_type(float_dtypes.get(col, float_dtype), float_dtype)
+
+    return {
+        col: int_dtypes[col] if int_dtypes[col] is not None else float_dtypes[col]
+        for col in candidates or []
+    }
+
+
+def iter_typed_chunks(file_path: Path, dtypes: dict[str, np.dtype]) -> Iterator[pd.DataFrame]:
+    """Yield chunks with numeric columns in their file-wide dtypes and the rest as text."""
+    # Floats parse as float64 first, like the in-memory read, and are narrowed after
+    read_dtypes: defaultdict[str, object] = defaultdict(lambda: str)
+    for col, dtype in dtypes.items():
+        read_dtypes[col] = "float64" if dtype.kind == "f" else dtype
+    for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=read_dtypes):
+        yield chunk.astype(dtypes)
+
+
+def scan_duplicates_and_bounds(
+    file_path: Path, dtypes: dict[str, np.dtype]
+) -> tuple[pd.DataFrame, list[np.ndarray]]:
+    """Pass 2: mark repeated rows and take the outlier bounds from a sample of the kept rows.
+
+    Rows are compared on their parsed values, as DataFrame.duplicated does in the
+    in-memory path, so "10" and "10.0" in a float column are the same value.
+    Every unique row is remembered as one uint64 hash in a sorted array (8 bytes
+    per unique row), and the per-chunk keep masks (one byte per row) are returned
+    for pass 3. The bounds come from a reservoir sample of SAMPLE_SIZE kept rows,
+    so memory stays bounded by CHUNK_SIZE and SAMPLE_SIZE; files with at most
+    SAMPLE_SIZE unique rows get exact bounds.
+    """
+    numeric_cols = list(dtypes)
+    float_cols = [col for col, dtype in dtypes.items() if dtype.kind == "f"]
+    rng = np.random.default_rng(0)
+    seen = np.empty(0, dtype=np.uint64)
+    keep_masks: list[np.ndarray] = []
+    reservoir = np.full((SAMPLE_SIZE, len(numeric_cols)), np.nan)
+    filled = 0
+    rows_seen = 0
+
+    for chunk in iter_typed_chunks(file_path, dtypes):
+        # duplicated() treats -0.0 and 0.0 as equal but their hashes differ; adding 0.0 folds them
+        hashed = chunk.assign(**{col: chunk[col] + 0.0 for col in float_cols})
+        hashes = pd.util.hash_pandas_object(hashed, index=False).to_numpy()
+        repeated = pd.Series(hashes).duplicated().to_numpy()
+        if len(seen):
+            positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+            repeated |= seen[positions] == hashes
+        # Only new hashes are added; a stable sort of two sorted runs is a linear merge
+        seen = np.sort(np.concatenate([seen, np.sort(hashes[~repeated])]), kind="stable")
+        keep_masks.append(~repeated)
+
+        # Reservoir sampling (Algorithm R), vectorized per chunk
+        rows = chunk.loc[~repeated, numeric_cols].fillna(0).to_numpy(dtype="float64")
+        take = min(SAMPLE_SIZE - filled, len(rows))
+        reservoir[filled : filled + take] = rows[:take]
+        filled += take
+        rest = rows[take:]
+        if len(rest):
+            positions = rows_seen + take + np.arange(len(rest))
+            accept = rng.random(len(rest)) < SAMPLE_SIZE / (positions + 1)
+            reservoir[rng.integers(0, SAMPLE_SIZE, int(accept.sum()))] = rest[accept]
+        rows_seen += len(rows)
+
+    sample = pd.DataFrame(reservoir[:filled], columns=numeric_cols).astype(dtypes)
+    return sample.quantile([0.01, 0.99]), keep_masks
+
+
+def prepare_in_chunks(file_path: Path, output_path: Path) -> None:
+    """Clean a large sales file chunk by chunk, in three passes over the file."""
+    dtypes = scan_numeric_dtypes(file_path)
+    bounds, keep_masks = scan_duplicates_and_bounds(file_path, dtypes)
+    numeric_cols = list(dtypes)
+    logger.info("Chunked numeric dtypes: {}", dtypes)
+    logger.info("Chunked outlier bounds: {}", bounds.to_dict())
+
+    # Pass 3: clean each chunk, filter it with the global bounds and append it to the output
+    rows_written = 0
+    chunks = iter_typed_chunks(file_path, dtypes)
+    for i, (chunk, keep) in enumerate(zip(chunks, keep_masks, strict=True)):
+        scrubber = DataScrubber(chunk)
+        scrubber.handle_missing_data(fill_value=0)
+        in_bounds = scrubber.numeric_outlier_mask(numeric_cols, bounds.loc[0.01], bounds.loc[0.99])
+        scrubber.df = scrubber.df[keep & in_bounds]
+        for col in scrubber.df.columns:
+            if "date" in col.lower():
+                scrubber.parse_dates_to_add_standard_datetime(col)
+        write_prepared_csv(scrubber.df, output_path, append=i > 0)
+        rows_written += len(scrubber.df)
+    logger.info("Prepared sales rows written in chunks: {}", rows_written)
 
 
 def main() -> None:
@@ -44,32 +193,52 @@ def main() -> None:
     logger.info("STARTING prepare_sales_data.py")
     logger.info("=====================================")
 
+    _ensure_dirs()
+
     input_file = "sales_data.csv"
     output_file = "sales_data_prepared.csv"
 
+    input_path = RAW_DATA_DIR / input_file
+    if input_path.exists() and input_path.stat().st_size > CHUNKED_THRESHOLD_BYTES:
+        logger.info("Large sales file ({} bytes); cleaning in chunks", input_path.stat().st_size)
+        prepare_in_chunks(input_path, PREPARED_DATA_DIR / output_file)
+        logger.info("FINISHED prepare_sales_data.py")
+        logger.info("=====================================")
+        return
+
     df_raw = read_raw_data(input_file)
     if df_raw.empty:
         logger.error("No sales data loaded. Aborting.")
         return
 
     original_shape = df_raw.shape
-    logger.info(f"Initial sales shape: {original_shape}")
-    logger.info(f"Initial sales columns: {list(df_raw.columns)}")
+    logger.info("Initial sales shape: {}", original_shape)
+    logger.info("Initial sales columns: {}", list(df_raw.columns))
+
+    scrubber = DataScrubber(df_raw)
 
-    scrubber = DataScrubber(df_raw.copy())
+    # Narrow numeric dtypes so the mask and quantile passes move fewer bytes
+    scrubber.downcast_numeric_columns()
+    logger.info("Numeric dtypes: {}", scrubber.df.select_dtypes(include="number").dtypes.to_dict())
 
-    # Remove duplicates
-    scrubber.remove_duplicate_records()
+    # Duplicates (marked here, dropped together with the outliers below)
+    keep = ~scrubber.duplicate_mask()
 
     # Missing values
     scrubber.handle_missing_data(fill_value=0)
 
-    # Outliers on numeric columns
-    numeric_cols = scrubber.df.select_dtypes(include="number").columns
-    for col in numeric_cols:
-        q_low = scrubber.df[col].quantile(0.01)
-        q_high = scrubber.df[col].quantile(0.99)
-        scrubber.filter_column_outliers(col, q_low, q_high)
+    # Outliers on numeric columns, with bounds taken from the de-duplicated rows
+    numeric_cols = scrubber.df.select_dtypes(include="number").columns.tolist()
+    bounds = scrubber.df.loc[keep, numeric_cols].quantile([0.01, 0.99])
+    in_bounds = scrubber.numeric_outlier_mask(numeric_cols, bounds.loc[0.01], bounds.loc[0.99])
+    logger.info(
+        "Dropping {} duplicate and {} outlier rows",
+        int((~keep).sum()),
+        int((keep & ~in_bounds).sum()),
+    )
+
+    # Select the kept rows once
+    scrubber.df = scrubber.df[keep & in_bounds]
 
     # If a date column exists, parse it
     for col in scrubber.df.columns:
@@ -79,7 +248,7 @@ def main() -> None:
     df_clean = scrubber.df
     save_prepared_data(df_clean, output_file)
 
-    logger.info(f"Prepared sales shape:  {df_clean.shape}")
+    logger.info("Prepared sales shape:  {}", df_clean.shape)
     logger.info("FINISHED prepare_sales_data.py")
     logger.info("=====================================")
 
@@ -0,0 +1,46 @@
+"""Run the three prepare_*_data.py scripts in parallel, one process per script.
+
+File: src/analytics_project/data_prep/run_all.py.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import runpy
+
+from analytics_project.utils_logger import logger
+
+DATA_PREP_DIR: Path = Path(__file__).resolve().parent
+
+PREPARE_SCRIPTS: list[Path] = [
+    DATA_PREP_DIR / "prepare_customers_data.py",
+    DATA_PREP_DIR / "prepare_products_data.py",
+    DATA_PREP_DIR / "prepare_sales_data.py",
+]
+
+
+def run_script(script_path: Path) -> None:
+    """Run one prepare script exactly as `python <script_path>` would."""
+    runpy.run_path(str(script_path), run_name="__main__")
+
+
+def main() -> None:
+    """Run every prepare script in its own process and log each as it finishes."""
+    logger.info("=====================================")
+    logger.info("STARTING run_all.py ({} prepare scripts in parallel)", len(PREPARE_SCRIPTS))
+    logger.info("=====================================")
+
+    # The scripts read and write different files, so each gets its own process
+    with ProcessPoolExecutor(max_workers=len(PREPARE_SCRIPTS)) as executor:
+        futures = {executor.submit(run_script, path): path for path in PREPARE_SCRIPTS}
+        for future in as_completed(futures):
+            future.result()
+            logger.info("Finished {}", futures[future].name)
+
+    logger.info("FINISHED run_all.py")
+    logger.info("=====================================")
+
+
+if __name__ == "__main__":
+    main()
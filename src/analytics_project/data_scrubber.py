@@ -5,7 +5,65 @@ preparation tasks on a pandas DataFrame.
 """
 
 import io
+import pathlib
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Date layouts recognized from a sample of values, mapped to an explicit pandas format
+DATE_FORMAT_PATTERNS: list[tuple[str, str]] = [
+    (r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?", "ISO8601"),
+    (r"\d{1,2}/\d{1,2}/\d{4}", "%m/%d/%Y"),
+]
+
+
+def _detect_date_format(values: pd.Series, sample_size: int = 1000) -> str | None:
+    """Return the format matching most of a sample of the values, or None if none match."""
+    sample = values.dropna().head(sample_size).astype(str)
+    if sample.empty:
+        return None
+    best_format, best_share = None, 0.0
+    for pattern, date_format in DATE_FORMAT_PATTERNS:
+        share = sample.str.fullmatch(pattern).mean()
+        if share > best_share:
+            best_format, best_share = date_format, share
+    return best_format
+
+
+def format_datetimes(values: pd.Series) -> pd.Series:
+    """Format datetimes as ISO text: the date alone at midnight, else date and time (NaT stays missing)."""
+    text = values.dt.strftime("%Y-%m-%d").to_numpy()
+    timed = (values.notna() & values.dt.normalize().ne(values)).to_numpy()
+    if timed.any():
+        text[timed] = values[timed].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+    return pd.Series(text, index=values.index)
+
+
+def _csv_ready(values: pd.Series) -> pd.Series:
+    """Return values in a form the Arrow writer accepts and renders like DataFrame.to_csv."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return format_datetimes(values)
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True).startswith("mixed"):
+        # Numbers mixed into text (e.g. a fill value) have no Arrow type; write them via str()
+        return values.astype(str).where(values.notna())
+    return values
+
+
+def write_prepared_csv(df: pd.DataFrame, file_path: pathlib.Path, append: bool = False) -> None:
+    """Write df as CSV with pyarrow's writer, appending rows without a header when asked.
+
+    Every frame goes through the same writer (strings quoted, datetimes as ISO
+    text), so a file's format does not depend on its column types or on which
+    chunk a row came from.
+    """
+    table = pa.Table.from_arrays(
+        [pa.Array.from_pandas(_csv_ready(df[column])) for column in df.columns],
+        names=[str(column) for column in df.columns],
+    )
+    with file_path.open("ab" if append else "wb") as sink:
+        pacsv.write_csv(table, sink, write_options=pacsv.WriteOptions(include_header=not append))
 
 
 class DataScrubber:
@@ -35,13 +93,25 @@ class DataScrubber:
     # -------------------------------------------------
     # DATA TYPE HANDLING
     # -------------------------------------------------
-    def convert_column_to_new_data_type(self, column: str, new_type: type) -> pd.DataFrame:
+    def convert_column_to_new_data_type(self, column: str, new_type: type | str) -> pd.DataFrame:
         """Convert a specified column to a new data type."""
-        try:
-            self.df[column] = self.df[column].astype(new_type)
-            return self.df
-        except KeyError as exc:
-            raise ValueError(f"Column name '{column}' not found in the DataFrame.") from exc
+        if column not in self.df.columns:
+            raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        self.df[column] = self.df[column].astype(new_type)
+        return self.df
+
+    def downcast_numeric_columns(self) -> pd.DataFrame:
+        """Downcast integer and float columns to the smallest dtype that holds their values exactly."""
+        for column in self.df.select_dtypes(include="integer").columns:
+            self.df[column] = pd.to_numeric(self.df[column], downcast="integer")
+        for column in self.df.select_dtypes(include="float").columns:
+            values = self.df[column]
+            narrowed = pd.to_numeric(values, downcast="float")
+            # to_numeric accepts float32 within a tolerance, and the downcast frame is the
+            # one that gets saved, so keep float32 only when every value round-trips
+            if narrowed.astype(values.dtype).equals(values):
+                self.df[column] = narrowed
+        return self.df
 
     # -------------------------------------------------
     # COLUMN MANIPULATION
@@ -61,30 +131,76 @@ class DataScrubber:
         self, column: str, lower_bound: float | int, upper_bound: float | int
     ) -> pd.DataFrame:
         """Filter outliers in a specified column based on lower and upper bounds."""
-        try:
-            self.df = self.df[(self.df[column] >= lower_bound) & (self.df[column] <= upper_bound)]
-            return self.df
-        except KeyError as exc:
-            raise ValueError(f"Column name '{column}' not found in the DataFrame.") from exc
+        if column not in self.df.columns:
+            raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        values = self.df[column].to_numpy()
+        in_bounds = values >= lower_bound
+        in_bounds &= values <= upper_bound
+        self.df = self.df.iloc[in_bounds]
+        return self.df
+
+    def numeric_outlier_mask(
+        self,
+        columns: list[str],
+        lower_bounds: pd.Series | list[float | int],
+        upper_bounds: pd.Series | list[float | int],
+    ) -> np.ndarray:
+        """Return a boolean row mask that is True where every column lies within its bounds."""
+        for column in columns:
+            if column not in self.df.columns:
+                raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        # Nullable/Arrow columns with NA become NaN, which fails both comparisons
+        values = self.df[columns].to_numpy(dtype="float64", na_value=np.nan)
+        # Series bounds are matched by column name, lists by position
+        if isinstance(lower_bounds, pd.Series):
+            lower_bounds = lower_bounds.reindex(columns)
+        if isinstance(upper_bounds, pd.Series):
+            upper_bounds = upper_bounds.reindex(columns)
+        lower = np.asarray(lower_bounds, dtype=float)
+        upper = np.asarray(upper_bounds, dtype=float)
+        in_bounds = values >= lower
+        in_bounds &= values <= upper
+        return in_bounds.all(axis=1)
+
+    def filter_numeric_outliers(
+        self,
+        columns: list[str],
+        lower_bounds: pd.Series | list[float | int],
+        upper_bounds: pd.Series | list[float | int],
+    ) -> pd.DataFrame:
+        """Filter outliers across several columns at once, selecting the kept rows a single time."""
+        self.df = self.df[self.numeric_outlier_mask(columns, lower_bounds, upper_bounds)]
+        return self.df
 
     # -------------------------------------------------
     # STRING FORMATTING
     # -------------------------------------------------
     def format_column_strings_to_lower_and_trim(self, column: str) -> pd.DataFrame:
         """Format strings in a specified column by converting to lowercase and trimming whitespace."""
-        try:
-            self.df[column] = self.df[column].str.lower().str.strip()
-            return self.df
-        except KeyError as exc:
-            raise ValueError(f"Column name '{column}' not found in the DataFrame.") from exc
+        if column not in self.df.columns:
+            raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Format each distinct value once instead of every row.
+            categories = series.cat.categories
+            formatted = categories.str.lower().str.strip()
+            self.df[column] = series.map(dict(zip(categories, formatted, strict=True)))
+        else:
+            self.df[column] = series.str.lower().str.strip()
+        return self.df
 
     def format_column_strings_to_upper_and_trim(self, column: str) -> pd.DataFrame:
         """Format strings in a specified column by converting to uppercase and trimming whitespace."""
-        try:
-            self.df[column] = self.df[column].str.upper().str.strip()
-            return self.df
-        except KeyError as exc:
-            raise ValueError(f"Column name '{column}' not found in the DataFrame.") from exc
+        if column not in self.df.columns:
+            raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            formatted = categories.str.upper().str.strip()
+            self.df[column] = series.map(dict(zip(categories, formatted, strict=True)))
+        else:
+            self.df[column] = series.str.upper().str.strip()
+        return self.df
 
     # -------------------------------------------------
     # MISSING DATA HANDLING
@@ -113,24 +229,37 @@ class DataScrubber:
     # -------------------------------------------------
     # DATE PARSING
     # -------------------------------------------------
-    def parse_dates_to_add_standard_datetime(self, column: str) -> pd.DataFrame:
+    def parse_dates_to_add_standard_datetime(
+        self, column: str, fmt: str | None = None
+    ) -> pd.DataFrame:
         """Parse column into datetime with coercion so invalid dates NEVER break the pipeline."""
-        try:
-            self.df["StandardDateTime"] = pd.to_datetime(
-                self.df[column],
-                errors="coerce",  # ← KEY FIX: invalid dates → NaT
-                format="mixed",  # ← tries to detect date format automatically
-            )
-            return self.df
-        except KeyError as exc:
-            raise ValueError(f"Column name '{column}' not found in the DataFrame.") from exc
+        if column not in self.df.columns:
+            raise ValueError(f"Column name '{column}' not found in the DataFrame.")
+        values = self.df[column]
+        # An explicit format (given or detected from a sample) uses pandas' fast parser
+        fmt = fmt or _detect_date_format(values)
+        parsed = pd.to_datetime(
+            values,
+            errors="coerce",  # ← KEY FIX: invalid dates → NaT
+            format=fmt or "mixed",  # ← "mixed" tries to detect date format per value
+        )
+        # Values that do not fit the explicit format get the per-value parse
+        retry = parsed.isna() & values.notna()
+        if fmt is not None and retry.any():
+            parsed.loc[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+        self.df["StandardDateTime"] = parsed
+        return self.df
 
     # -------------------------------------------------
     # DUPLICATES
     # -------------------------------------------------
+    def duplicate_mask(self) -> np.ndarray:
+        """Return a boolean row mask that is True for rows repeating an earlier row."""
+        return self.df.duplicated().to_numpy()
+
     def remove_duplicate_records(self) -> pd.DataFrame:
         """Remove duplicate rows from the DataFrame."""
-        self.df = self.df.drop_duplicates()
+        self.df = self.df[~self.duplicate_mask()]
         return self.df
 
     # -------------------------------------------------
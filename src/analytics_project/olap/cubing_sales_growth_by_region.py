@@ -5,10 +5,14 @@ Este script crea un cubo con revenue mensual por región
 a partir del DW (smart_sales_dw.db).
 """
 
+from collections.abc import Iterable, Iterator
 import pathlib
 import sqlite3
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 from analytics_project.utils_logger import logger
 
@@ -27,97 +31,163 @@ DB_PATH: pathlib.Path = WAREHOUSE_DIR / "smart_sales_dw.db"
 OLAP_OUTPUT_DIR: pathlib.Path = DATA_DIR / "olap_cubing_outputs"
 OLAP_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Filas por bloque al leer el DW; el cubo se acumula bloque a bloque
+CHUNK_SIZE: int = 200_000
 
-def ingest_sales_with_region_from_dw() -> pd.DataFrame:
+# Formato con el que el ETL guarda sale_date en el DW (ej. 5/4/2025)
+SALE_DATE_PATTERN: str = r"^(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})$"
+
+# Días de cada mes en un año no bisiesto (febrero se corrige aparte)
+DAYS_IN_MONTH: pd.Series = pd.Series(
+    [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], index=range(1, 13)
+)
+
+
+def ingest_sales_with_region_from_dw(chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
     """
-    Leer ventas + región desde el DW.
+    Leer ventas + región desde el DW en bloques de `chunksize` filas.
 
     Usa fact_sales + dim_customer, que son las tablas de tu esquema.
+    SQLite ya agrupa por día y región, así que llegan pocas filas a pandas.
     """
 
     query = """
         SELECT
-            s.sale_id,
-            s.customer_id,
-            s.product_id,
             s.sale_date,
-            s.sale_amount,
-            c.region
+            c.region,
+            SUM(s.sale_amount) AS TotalRevenue,
+            COUNT(s.sale_id) AS TransactionCount
         FROM fact_sales AS s
         JOIN dim_customer AS c
             ON s.customer_id = c.customer_id
+        WHERE s.sale_amount IS NOT NULL
+        GROUP BY s.sale_date, c.region
+    """
+    invalid_query = """
+        SELECT COUNT(*)
+        FROM fact_sales
+        WHERE sale_amount IS NULL
     """
 
     try:
         conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        try:
+            invalid_amounts = conn.execute(invalid_query).fetchone()[0]
+            if invalid_amounts > 0:
+                logger.warning(f"Dropping {invalid_amounts} rows with invalid sale_amount values.")
+            cursor = conn.execute(query)
+            while rows := cursor.fetchmany(chunksize):
+                yield rows_to_frame(rows)
+        finally:
+            conn.close()
         logger.info("Sales + region loaded from DW (fact_sales + dim_customer).")
-        return df
     except Exception as e:
         logger.error(f"Error loading data from DW: {e}")
         raise
 
 
-def create_sales_growth_cube(df: pd.DataFrame) -> pd.DataFrame:
-    """Crear cubo mensual por región."""
-
-    # 1) Asegurar que sale_date sea fecha válida
-    df["sale_date"] = pd.to_datetime(df["sale_date"], errors="coerce")
-    invalid_dates = df["sale_date"].isna().sum()
-    if invalid_dates > 0:
-        logger.warning(f"Dropping {invalid_dates} rows with invalid sale_date values.")
-        df = df.dropna(subset=["sale_date"])
-
-    # 2) Asegurar que sale_amount sea numérico
-    df["sale_amount"] = (
-        df["sale_amount"]
-        .astype(str)  # todo a string
-        .str.strip()  # saco espacios
-        .replace(["", "NA", "N/A", "null", "None"], pd.NA)
+def rows_to_frame(rows: list[tuple]) -> pd.DataFrame:
+    """Pasar un bloque de filas del cursor a columnas tipadas, sin el armado genérico de pandas."""
+    sale_date, region, revenue, count = zip(*rows, strict=True)
+    return pd.DataFrame(
+        {
+            "sale_date": np.array(sale_date, dtype=object),
+            # Pocas regiones distintas: category evita repetir los strings por fila
+            "region": pd.Categorical(region),
+            "TotalRevenue": np.array(revenue, dtype=np.float64),
+            "TransactionCount": np.array(count, dtype=np.int64),
+        }
     )
-    df["sale_amount"] = pd.to_numeric(df["sale_amount"], errors="coerce")
 
-    invalid_amounts = df["sale_amount"].isna().sum()
-    if invalid_amounts > 0:
-        logger.warning(f"Dropping {invalid_amounts} rows with invalid sale_amount values.")
-        df = df.dropna(subset=["sale_amount"])
+
+def clean_sales_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Limpiar un bloque de ventas diarias y agregarle Year y Month."""
+
+    # 1) Year y Month salen del texto M/D/YYYY, sin construir fechas
+    raw_dates = df["sale_date"].astype("string")
+    parts = raw_dates.str.extract(SALE_DATE_PATTERN)
+    year = pd.to_numeric(parts["year"])
+    month = pd.to_numeric(parts["month"])
+    day = pd.to_numeric(parts["day"])
+    # El día tiene que existir en ese mes (2/31/2025 o 5/99/2025 no son fechas)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    last_day = month.map(DAYS_IN_MONTH) + (leap & month.eq(2))
+    valid = month.between(1, 12) & day.between(1, last_day)
+    year = year.where(valid)
+    month = month.where(valid)
+    # Solo fechas con otra forma se reintentan, y solo como ISO: un M/D/YYYY
+    # imposible (ej. 13/3/2025) se descarta en vez de leerse día primero
+    retry = parts["year"].isna() & raw_dates.notna()
+    if retry.any():
+        parsed = pd.to_datetime(raw_dates[retry], format="ISO8601", errors="coerce")
+        year[retry] = parsed.dt.year
+        month[retry] = parsed.dt.month
+
+    # 2) Asegurar que sale_date sea fecha válida
+    invalid = year.isna() | month.isna()
+    if invalid.any():
+        invalid_dates = df.loc[invalid, "TransactionCount"].sum()
+        logger.warning(f"Dropping {invalid_dates} rows with invalid sale_date values.")
+        df = df.loc[~invalid].copy()
 
     # 3) Crear columnas de tiempo
-    df["Year"] = df["sale_date"].dt.year
-    df["Month"] = df["sale_date"].dt.month
-
-    # 4) Agrupar por Year-Month-Region
-    grouped = (
-        df.groupby(["Year", "Month", "region"])
-        .agg(
-            TotalRevenue=("sale_amount", "sum"),
-            TransactionCount=("sale_id", "count"),
+    df["Year"] = year[~invalid].astype("int16")
+    df["Month"] = month[~invalid].astype("int8")
+
+    return df
+
+
+def create_sales_growth_cube(chunks: Iterable[pd.DataFrame] | pd.DataFrame) -> pd.DataFrame:
+    """Crear cubo mensual por región, acumulando sumas parciales por bloque."""
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    # 4) Pasar de día a Year-Month-Region (suma y conteo se combinan sumando)
+    cube = None
+    for chunk in chunks:
+        partial = (
+            clean_sales_chunk(chunk)
+            .groupby(["Year", "Month", "region"], observed=True)
+            .agg(
+                TotalRevenue=("TotalRevenue", "sum"),
+                TransactionCount=("TransactionCount", "sum"),
+            )
         )
-        .reset_index()
-    )
+        cube = partial if cube is None else cube.add(partial, fill_value=0)
+
+    if cube is None:
+        return pd.DataFrame(columns=["Year", "Month", "region", "TotalRevenue", "TransactionCount"])
+
+    grouped = cube.astype({"TransactionCount": "int64"}).reset_index()
+    grouped["region"] = grouped["region"].astype("category")
+    # Montos en centavos: redondear quita el ruido de sumar en SQLite y por bloques
+    grouped["TotalRevenue"] = grouped["TotalRevenue"].round(2)
 
     logger.info("Sales growth cube created (Year-Month-Region).")
     return grouped
 
 
 def write_cube_to_csv(cube: pd.DataFrame, filename: str) -> None:
-    """Guardar el cubo en CSV."""
+    """Guardar el cubo en CSV, más una copia Parquet tipada para el script de goal."""
     output_path = OLAP_OUTPUT_DIR / filename
-    cube.to_csv(output_path, index=False)
+    pacsv.write_csv(pa.Table.from_pandas(cube, preserve_index=False), str(output_path))
     logger.info(f"Cube saved to {output_path}")
 
+    # Parquet conserva los tipos (region categórica, Year/Month enteros chicos)
+    parquet_path = output_path.with_suffix(".parquet")
+    cube.to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+    logger.info(f"Cube saved to {parquet_path}")
+
 
 def main():
     logger.info("Starting cubing: sales growth by region...")
 
-    df = ingest_sales_with_region_from_dw()
-    if df.empty:
+    cube = create_sales_growth_cube(ingest_sales_with_region_from_dw())
+    if cube.empty:
         logger.warning(
             "WARNING: No data returned from DW. Run ETL to DW before running this cubing script."
         )
 
-    cube = create_sales_growth_cube(df)
     write_cube_to_csv(cube, "sales_growth_by_region_cube.csv")
 
     logger.info("Cubing completed successfully.")
@@ -2,15 +2,20 @@
 Goal Script: Sales Growth by Region
 Author: Eze Tolosa
 
-This script takes the cube created in P6 (sales_growth_by_region_cube.csv),
-normalizes region names, computes total revenue by region, and identifies
-which regions perform best.
+This script takes the cube created in P6 (sales_growth_by_region_cube.csv,
+or its typed .parquet copy when present), normalizes region names, computes
+total revenue by region, and identifies which regions perform best.
 
 It serves as the final analysis deliverable for Module 6 (OLAP).
 """
 
 import pathlib
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import matplotlib
+
+matplotlib.use("Agg")  # PNG output only; select before pyplot is imported
 import matplotlib.pyplot as plt
 
 from analytics_project.utils_logger import logger
@@ -44,15 +49,28 @@ REGION_MAP = {
     "central": "CENTRAL",
 }
 
+# REGION_MAP as a small dimension table, so lookups are one hash join
+REGION_DIM = pd.DataFrame(
+    {"region_raw": list(REGION_MAP), "region_clean": list(REGION_MAP.values())}
+).astype({"region_raw": "string"})
+
 
-def normalize_region(region: str) -> str:
-    """Clean and standardize region names."""
-    if not isinstance(region, str):
-        return "UNKNOWN"
+def normalize_region_series(regions: pd.Series) -> pd.Series:
+    """Clean and standardize region names (non-strings become UNKNOWN)."""
+    if isinstance(regions.dtype, pd.CategoricalDtype):
+        # Normalize each category once, then expand through the codes; code -1
+        # (missing) is not in the labels' index, so it comes back as NaN
+        labels = normalize_region_series(pd.Series(regions.cat.categories, dtype=object))
+        normalized = labels.reindex(regions.cat.codes).set_axis(regions.index)
+        return normalized.fillna("UNKNOWN")
 
-    cleaned = region.strip().lower().replace("_", "-")
+    is_str = regions.map(type).eq(str)
+    cleaned = regions.where(is_str).astype("string").str.strip().str.lower()
+    cleaned = cleaned.str.replace("_", "-", regex=False)
 
-    return REGION_MAP.get(cleaned, cleaned.upper())
+    merged = cleaned.to_frame("region_raw").merge(REGION_DIM, on="region_raw", how="left")
+    normalized = merged["region_clean"].set_axis(regions.index).fillna(cleaned.str.upper())
+    return normalized.where(is_str, "UNKNOWN").astype(object)
 
 
 # -------------------------------------------------------------------
@@ -61,16 +79,21 @@ def normalize_region(region: str) -> str:
 
 
 def load_cube():
-    """Load the previously created cube into a dataframe."""
+    """Load the previously created cube, preferring its typed Parquet copy."""
+    parquet_file = CUBE_FILE.with_suffix(".parquet")
+    if parquet_file.exists():
+        logger.info(f"Loading cube from: {parquet_file}")
+        return pd.read_parquet(parquet_file, engine="pyarrow")
+
     logger.info(f"Loading cube from: {CUBE_FILE}")
-    return pd.read_csv(CUBE_FILE)
+    return pd.read_csv(CUBE_FILE, engine="pyarrow", dtype={"region": "category"})
 
 
 def clean_cube(df: pd.DataFrame) -> pd.DataFrame:
     """Apply region normalization and return a clean cube."""
     logger.info("Normalizing region names...")
 
-    df["region_clean"] = df["region"].apply(normalize_region)
+    df["region_clean"] = normalize_region_series(df["region"])
 
     # Group duplicate cleaned regions
     df_clean = (
@@ -93,16 +116,17 @@ def summarize(df: pd.DataFrame):
 
 def plot_summary(summary_df: pd.DataFrame):
     """Create a bar chart of revenue by region."""
-    plt.figure(figsize=(10, 6))
-    plt.bar(summary_df["region_clean"], summary_df["TotalRevenue"])
-    plt.title("Total Revenue by Region")
-    plt.xlabel("Region")
-    plt.ylabel("Revenue")
-    plt.tight_layout()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(summary_df["region_clean"], summary_df["TotalRevenue"])
+    ax.set_title("Total Revenue by Region")
+    ax.set_xlabel("Region")
+    ax.set_ylabel("Revenue")
+    # Fixed margins instead of the iterative tight_layout solver
+    fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.2)
 
     output_path = RESULTS_DIR / "sales_growth_by_region.png"
-    plt.savefig(output_path)
-    plt.close()
+    fig.savefig(output_path)
+    plt.close(fig)
 
     logger.info(f"Plot saved to: {output_path}")
 
@@ -123,7 +147,7 @@ def main():
 
     # Save summary
     summary_path = RESULTS_DIR / "sales_growth_by_region_summary.csv"
-    summary.to_csv(summary_path, index=False)
+    pacsv.write_csv(pa.Table.from_pandas(summary, preserve_index=False), str(summary_path))
     logger.info(f"Summary saved to: {summary_path}")
 
     # Visualization
@@ -1,20 +1,27 @@
+import pathlib
+import tempfile
 import unittest
 import pandas as pd
 
-from analytics_project.data_scrubber import DataScrubber
+from analytics_project.data_scrubber import DataScrubber, write_prepared_csv
 
 
 class TestDataScrubber(unittest.TestCase):
-    def setUp(self):
-        # Small toy DataFrame to test with
-        self.df = pd.DataFrame(
+    @classmethod
+    def setUpClass(cls):
+        # Small toy DataFrame to test with, built once for the whole class
+        cls._base_df = pd.DataFrame(
             {
                 "name": [" Alice ", "BOB", "Alice ", None],
                 "age": [25, 30, 25, None],
                 "score": [10, 999, 15, 20],
             }
         )
-        self.scrubber = DataScrubber(self.df.copy())
+
+    def setUp(self):
+        # Each test gets its own copies, so in-place scrubbing never leaks between tests
+        self.df = self._base_df.copy()
+        self.scrubber = DataScrubber(self._base_df.copy())
 
     def test_remove_duplicate_records(self):
         df_dup = pd.concat([self.scrubber.df, self.scrubber.df.iloc[[0]]], ignore_index=True)
@@ -24,6 +31,11 @@ class TestDataScrubber(unittest.TestCase):
         after = len(scrubber2.df)
         self.assertLess(after, before)
 
+    def test_duplicate_mask(self):
+        df_dup = pd.concat([self.df, self.df.iloc[[0]]], ignore_index=True)
+        mask = DataScrubber(df_dup).duplicate_mask()
+        self.assertEqual(mask.tolist(), [False, False, False, False, True])
+
     def test_handle_missing_data_fill(self):
         scrubbed = self.scrubber.handle_missing_data(fill_value=0)
         self.assertFalse(scrubbed.isnull().any().any())
@@ -39,6 +51,19 @@ class TestDataScrubber(unittest.TestCase):
         self.assertIn("alice", scrubbed["name"].tolist())
         self.assertIn("bob", scrubbed["name"].tolist())
 
+    def test_missing_column_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.scrubber.format_column_strings_to_lower_and_trim("missing")
+        with self.assertRaises(ValueError):
+            self.scrubber.filter_column_outliers("missing", 0, 1)
+
+    def test_format_categorical_strings_to_lower_and_trim(self):
+        scrubber2 = DataScrubber(self.df.copy())
+        scrubber2.convert_column_to_new_data_type("name", "category")
+        scrubbed = scrubber2.format_column_strings_to_lower_and_trim("name")
+        self.assertEqual(scrubbed["name"].tolist()[:3], ["alice", "bob", "alice"])
+        self.assertTrue(scrubbed["name"].isna().iloc[3])
+
     def test_format_column_strings_to_upper_and_trim(self):
         scrubber2 = DataScrubber(self.df.copy())
         scrubbed = scrubber2.format_column_strings_to_upper_and_trim("name")
@@ -52,6 +77,55 @@ class TestDataScrubber(unittest.TestCase):
         self.assertIn("StandardDateTime", scrubbed.columns)
         self.assertTrue(pd.api.types.is_datetime64_any_dtype(scrubbed["StandardDateTime"]))
 
+    def test_downcast_numeric_columns(self):
+        scrubbed = self.scrubber.downcast_numeric_columns()
+        self.assertEqual(scrubbed["score"].dtype, "int16")
+        self.assertEqual(scrubbed["age"].dtype, "float32")
+
+    def test_downcast_keeps_float64_when_float32_would_round(self):
+        df_floats = pd.DataFrame({"exact": [0.5, None], "precise": [0.123456789, 1.0]})
+        scrubbed = DataScrubber(df_floats).downcast_numeric_columns()
+        self.assertEqual(scrubbed["exact"].dtype, "float32")
+        self.assertEqual(scrubbed["precise"].dtype, "float64")
+        self.assertEqual(scrubbed["precise"].iloc[0], 0.123456789)
+
+    def test_filter_column_outliers(self):
+        scrubbed = self.scrubber.filter_column_outliers("score", 0, 100)
+        self.assertEqual(scrubbed["score"].tolist(), [10, 15, 20])
+
+    def test_filter_numeric_outliers(self):
+        df_num = pd.DataFrame({"a": [1, 2, 3, 100], "b": [10, 20, -5, 30]})
+        scrubber5 = DataScrubber(df_num)
+        scrubbed = scrubber5.filter_numeric_outliers(["a", "b"], [0, 0], [10, 50])
+        self.assertEqual(scrubbed["a"].tolist(), [1, 2])
+
+        with self.assertRaises(ValueError):
+            scrubber5.filter_numeric_outliers(["missing"], [0], [1])
+
+    def test_numeric_outlier_mask_nullable_and_named_bounds(self):
+        df_num = pd.DataFrame(
+            {"a": pd.array([1, None, 3], dtype="Int64"), "b": [10.0, 20.0, 300.0]}
+        )
+        lower = pd.Series({"b": 0, "a": 0})
+        upper = pd.Series({"b": 50, "a": 10})
+        mask = DataScrubber(df_num).numeric_outlier_mask(["a", "b"], lower, upper)
+        self.assertEqual(mask.tolist(), [True, False, False])
+
+    def test_parse_dates_with_detected_format_and_mixed_fallback(self):
+        df_dates = pd.DataFrame({"order_date": ["5/4/2025", "12/31/2024", "2024-02-15", "bad"]})
+        scrubbed = DataScrubber(df_dates).parse_dates_to_add_standard_datetime("order_date")
+        parsed = scrubbed["StandardDateTime"]
+        self.assertEqual(parsed.iloc[0], pd.Timestamp("2025-05-04"))
+        self.assertEqual(parsed.iloc[2], pd.Timestamp("2024-02-15"))
+        self.assertTrue(pd.isna(parsed.iloc[3]))
+
+    def test_parse_dates_with_explicit_format(self):
+        df_dates = pd.DataFrame({"order_date": ["04/05/2025"]})
+        scrubbed = DataScrubber(df_dates).parse_dates_to_add_standard_datetime(
+            "order_date", fmt="%d/%m/%Y"
+        )
+        self.assertEqual(scrubbed["StandardDateTime"].iloc[0], pd.Timestamp("2025-05-04"))
+
     def test_rename_and_reorder_columns(self):
         df_small = pd.DataFrame({"A": [1, 2], "B": [3, 4]})
         scrubber4 = DataScrubber(df_small)
@@ -62,6 +136,22 @@ class TestDataScrubber(unittest.TestCase):
         scrubber4.reorder_columns(["second", "first"])
         self.assertEqual(list(scrubber4.df.columns), ["second", "first"])
 
+    def test_write_prepared_csv_same_format_for_every_chunk(self):
+        # Chunk one mixes a fill value into text and has a time; chunk two is plain
+        first = pd.DataFrame(
+            {
+                "code": ["a", 0],
+                "when": [pd.Timestamp("2025-05-04"), pd.Timestamp("2025-05-04 10:30:00")],
+            }
+        )
+        second = pd.DataFrame({"code": ["b"], "when": [pd.NaT]})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "out.csv"
+            write_prepared_csv(first, path)
+            write_prepared_csv(second, path, append=True)
+            text = path.read_text()
+        self.assertEqual(text, '"code","when"\n"a","2025-05-04"\n"0","2025-05-04 10:30:00"\n"b",\n')
+
 
 if __name__ == "__main__":
     unittest.main()
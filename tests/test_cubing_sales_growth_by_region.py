@@ -0,0 +1,40 @@
+"""Test how the OLAP cube reads sale dates.
+
+Module Information:
+    - Filename: test_cubing_sales_growth_by_region.py
+    - Module: test_cubing_sales_growth_by_region
+    - Location: tests/
+
+The cube takes Year and Month straight from the M/D/YYYY text, so these
+tests check that impossible dates are dropped instead of being counted in
+some month.
+"""
+
+import pandas as pd
+
+from analytics_project.olap.cubing_sales_growth_by_region import create_sales_growth_cube
+
+
+def test_impossible_dates_are_dropped():
+    """Day past the month's end, or month 13, drops the row; leap days and ISO dates stay."""
+    daily = pd.DataFrame(
+        {
+            "sale_date": [
+                "5/4/2025",
+                "2/31/2025",
+                "5/99/2025",
+                "13/3/2025",
+                "2/29/2025",
+                "2/29/2024",
+                "2025-03-07",
+            ],
+            "region": "East",
+            "TotalRevenue": [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0],
+            "TransactionCount": 1,
+        }
+    )
+
+    cube = create_sales_growth_cube(daily)
+
+    months = cube.set_index(["Year", "Month"])["TotalRevenue"].to_dict()
+    assert months == {(2024, 2): 32.0, (2025, 3): 64.0, (2025, 5): 1.0}
@@ -0,0 +1,47 @@
+"""Test loading prepared CSVs into the SQLite data warehouse.
+
+Module Information:
+    - Filename: test_etl_to_dw.py
+    - Module: test_etl_to_dw
+    - Location: tests/
+
+The Arrow CSV parser turns ISO date text into timestamps or datetime.date
+objects, so these tests check that such columns still load as the text
+written in the prepared files.
+"""
+
+import sqlite3
+
+from analytics_project.dw import etl_to_dw
+
+
+def test_iso_dates_load_as_text(monkeypatch, tmp_path):
+    """ISO dates, datetimes and blanks are stored as TEXT or NULL, as the CSV wrote them."""
+    prepared = tmp_path / "prepared"
+    prepared.mkdir()
+    (prepared / "customers_data_prepared.csv").write_text(
+        "CustomerID,Name,Region,JoinDate\n1000,Ann,East,2024-02-25\n1001,Bob,West,\n"
+    )
+    (prepared / "products_data_prepared.csv").write_text(
+        "productid,productname,category,unitprice\n2000,pen,office,1.5\n"
+    )
+    (prepared / "sales_data_prepared.csv").write_text(
+        "TransactionID,SaleDate,CustomerID,ProductID,SaleAmount\n"
+        "1,2025-05-04 10:00:00,1000,2000,5.5\n"
+        "2,2025-05-05,1000,2000,6.0\n"
+        "3,,1001,2000,7.0\n"
+    )
+    monkeypatch.setattr(etl_to_dw, "PREPARED_DIR", prepared)
+    monkeypatch.setattr(etl_to_dw, "WAREHOUSE_DIR", tmp_path)
+    monkeypatch.setattr(etl_to_dw, "DB_PATH", tmp_path / "dw.db")
+
+    etl_to_dw.load_data_to_dw()
+
+    conn = sqlite3.connect(tmp_path / "dw.db")
+    try:
+        sales = conn.execute("SELECT sale_date FROM fact_sales ORDER BY sale_id").fetchall()
+        joins = conn.execute("SELECT join_date FROM dim_customer ORDER BY customer_id").fetchall()
+    finally:
+        conn.close()
+    assert sales == [("2025-05-04 10:00:00",), ("2025-05-05",), (None,)]
+    assert joins == [("2024-02-25",), (None,)]
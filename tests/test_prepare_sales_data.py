@@ -0,0 +1,111 @@
+"""Test the chunked path of the sales preparation script.
+
+Module Information:
+    - Filename: test_prepare_sales_data.py
+    - Module: test_prepare_sales_data
+    - Location: tests/
+
+The chunked path is only taken for very large raw files, so these tests
+force it with a tiny chunk size and check that it writes the same file as
+the in-memory path.
+"""
+
+import importlib.util
+from pathlib import Path
+import shutil
+
+import pandas as pd
+import pytest
+
+from analytics_project.utils_logger import project_root
+
+SCRIPT_PATH = project_root / "src" / "analytics_project" / "data_prep" / "prepare_sales_data.py"
+
+
+@pytest.fixture
+def prepare_sales():
+    """Load prepare_sales_data.py as a module (data_prep is a script folder, not a package)."""
+    spec = importlib.util.spec_from_file_location("prepare_sales_data", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_raw_sales(path: Path) -> None:
+    """Write a small raw sales file with duplicates, gaps, and outliers across chunks."""
+    rows = []
+    for i in range(60):
+        rows.append(
+            {
+                "TransactionID": i + 1,
+                "SaleDate": f"{i % 12 + 1}/{i % 28 + 1}/2025",
+                "CustomerID": 1000 + i % 20,
+                "CampaignID": i % 4,
+                "SaleAmount": round(10 + i * 7.31, 2),
+                "PaymentType": ["Online", "Credit", "Cash"][i % 3],
+            }
+        )
+    df = pd.DataFrame(rows).astype(object)
+    df.loc[45, "CustomerID"] = None  # one gap in a late chunk makes the column float
+    df.loc[12, "CampaignID"] = None
+    df.loc[30, "SaleAmount"] = 99999.99  # outlier
+    df = pd.concat([df, df.iloc[[50]]], ignore_index=True)  # repeat in a later chunk
+    df.to_csv(path, index=False)
+    # Row 4 again, with its float columns spelled differently (same parsed values)
+    with path.open("a") as f:
+        f.write("4,4/4/2025,1003.0,3.0,31.930,Online\n")
+
+
+def run_main(module, monkeypatch, raw_dir: Path, out_dir: Path, threshold: int) -> pd.DataFrame:
+    """Run the script's main() against raw_dir and return the prepared file."""
+    monkeypatch.setattr(module, "DATA_DIR", out_dir)
+    monkeypatch.setattr(module, "RAW_DATA_DIR", raw_dir)
+    monkeypatch.setattr(module, "PREPARED_DATA_DIR", out_dir)
+    monkeypatch.setattr(module, "CHUNKED_THRESHOLD_BYTES", threshold)
+    module.main()
+    return pd.read_csv(out_dir / "sales_data_prepared.csv")
+
+
+def test_chunked_path_matches_in_memory_path(prepare_sales, monkeypatch, tmp_path):
+    """Several chunks must give the same prepared rows as one in-memory pass."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_raw_sales(raw_dir / "sales_data.csv")
+    monkeypatch.setattr(prepare_sales, "CHUNK_SIZE", 7)
+
+    in_memory = run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "mem", 1 << 40)
+    chunked = run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "chunked", 0)
+
+    assert not chunked["TransactionID"].duplicated().any()
+    assert 99999.99 not in chunked["SaleAmount"].tolist()
+    pd.testing.assert_frame_equal(chunked, in_memory)
+
+
+def test_chunked_path_writes_one_dtype_per_column(prepare_sales, monkeypatch, tmp_path):
+    """A gap in one chunk must not change how the other chunks format that column."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_raw_sales(raw_dir / "sales_data.csv")
+    monkeypatch.setattr(prepare_sales, "CHUNK_SIZE", 7)
+
+    run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "mem", 1 << 40)
+    run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "chunked", 0)
+
+    in_memory = (tmp_path / "mem" / "sales_data_prepared.csv").read_text()
+    chunked = (tmp_path / "chunked" / "sales_data_prepared.csv").read_text()
+    assert chunked == in_memory
+
+
+def test_chunked_path_on_repo_raw_file(prepare_sales, monkeypatch, tmp_path):
+    """The project's own raw sales file (text placeholders, gaps, repeats) gives the same file."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    shutil.copy(project_root / "data" / "raw" / "sales_data.csv", raw_dir / "sales_data.csv")
+    monkeypatch.setattr(prepare_sales, "CHUNK_SIZE", 100)
+
+    run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "mem", 1 << 40)
+    run_main(prepare_sales, monkeypatch, raw_dir, tmp_path / "chunked", 0)
+
+    in_memory = (tmp_path / "mem" / "sales_data_prepared.csv").read_text()
+    chunked = (tmp_path / "chunked" / "sales_data_prepared.csv").read_text()
+    assert chunked == in_memory